@@ -5,30 +5,46 @@ DuckCLI Features:
 - Multi-Tab Support: Open meerdere bestanden of query's tegelijk.
 - File Filtering: DirectoryTree toont alleen ondersteunde bestanden.
 - Save Queries: Save queries with names to openduck.json
-- History: Store query history in openduck.json
+- History: Store query history in openduck.history.jsonl
 """
 
 import logging
-import datetime as dt_module
 from textual.app import App, ComposeResult
-from textual.containers import Horizontal, Vertical, Middle, ScrollableContainer
+from textual.containers import Horizontal, Vertical, Middle
 from textual.widgets import (
     Header, Footer, TextArea, DataTable, DirectoryTree,
-    Static, Input, Button, TabbedContent, TabPane, ListView, ListItem, Label,
+    Static, Input, Button, TabbedContent, TabPane,
     Tree, Select
 )
-from textual.events import MouseEvent, Click, MouseDown, MouseMove, MouseUp
+from textual.widgets.data_table import ColumnKey
+from textual.events import Click, MouseDown, MouseMove, MouseUp
 from textual.screen import ModalScreen
+from textual.message import Message
+from textual.content import Content, Span
+from rich.text import Span as TextSpan, Text
 from pathlib import Path
 from datetime import datetime
-from typing import Iterable, List, Any, Optional
+from typing import Iterable, Optional
+from collections import OrderedDict
 import duckdb
+import numpy as np
+import pyarrow as pa
 import os
 import asyncio
 import time
 import json
+import mmap
+import copy
+import re
 import resource
 import sys
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import orjson  # Optional: faster config/history (de)serialization
+except ImportError:
+    orjson = None
 
 # Configure logging to write to current directory with improved format
 logging.basicConfig(
@@ -38,108 +54,349 @@ logging.basicConfig(
     filemode='a'
 )
 logger = logging.getLogger(__name__)
-import random
 
 # =====================
 # Config & Helpers
 # =====================
 CWD = Path(os.getcwd())
 CONFIG_FILE = CWD / "openduck.json"
+# Query history is appended one JSON line per query instead of rewriting openduck.json
+HISTORY_FILE = CWD / "openduck.history.jsonl"
+# Most recent history entries kept in memory and shown in the history tree
+HISTORY_LIMIT = 500
+# Past this size the history file is rewritten down to its last HISTORY_LIMIT lines on load
+HISTORY_COMPACT_BYTES = 1024 * 1024
 DUCKDB_EXTENSIONS = {
     ".parquet", ".arrow", ".duckdb", ".csv", ".csv.gz",
     ".json", ".jsonl", ".sqlite", ".sqlite3", ".db", ".xlsx", ".xls"
 }
+# Rows pulled per fetchmany() call; matches DuckDB's vector size
+FETCH_BATCH_SIZE = 2048
+# Seconds between "Fetching..." row count updates; each one is a blocking round trip to the UI
+PROGRESS_INTERVAL = 0.1
+# Rows pushed into the results DataTable at a time; more are added on scroll
+PAGE_SIZE = 500
+# Name under which each tab's result is registered on its own DuckDB cursor
+RESULT_VIEW = "openduck_result"
+# Column header indicator for each (sort direction, has filter) state
+HEADER_SUFFIXES = {
+    (None, False): "", ("asc", False): " ▲", ("desc", False): " ▼",
+    (None, True): " 🔍", ("asc", True): " ▲ 🔍", ("desc", True): " ▼ 🔍",
+}
+# Number of read-only query results kept for instant re-runs, and their total Arrow size cap
+RESULT_CACHE_SIZE = 32
+RESULT_CACHE_BYTES = 256 * 1024 * 1024
+# Volatile functions: a query calling one is never cached
+VOLATILE_SQL_RE = re.compile(
+    r"""\b(?:random|setseed|uuid|gen_random_uuid|nextval|currval"""
+    r"""|now|today|get_current_\w+|transaction_timestamp)\s*\("""
+    r"""|\bcurrent_(?:date|time|timestamp|localtime|localtimestamp)\b""",
+    re.IGNORECASE,
+)
+# Table functions whose output depends only on their arguments; any other (file or remote
+# scans, glob, catalog functions) makes a query uncacheable
+CACHEABLE_TABLE_FUNCTIONS = {"range", "generate_series", "unnest"}
+# Number of parsed SQL scripts kept so re-runs skip DuckDB's parser
+STATEMENT_CACHE_SIZE = 64
+# Export dialog: default file name from the first FROM table, made filesystem-safe
+FROM_TABLE_RE = re.compile(r'FROM\s+(\w+)', re.IGNORECASE)
+UNSAFE_FILENAME_RE = re.compile(r'[^\w\-_]')
+# Query errors: where the source file path can be found in the SQL, in order of preference
+FILE_PATH_RES = tuple(re.compile(pattern) for pattern in (
+    r"read_csv_auto\('([^']+)'\)", r"read_json_auto\('([^']+)'\)", r"FROM '([^']+)'", r"Excel file: ([^\n]+)",
+))
+# Closed tabs kept hidden for reuse instead of rebuilding their widgets
+TAB_POOL_SIZE = 4
+# Pause in typing (seconds) before the database tree search is applied
+SEARCH_DEBOUNCE = 0.12
+
+# Plain suffixes are matched with one set lookup, multi-dot ones with endswith
+_SIMPLE_EXTENSIONS = frozenset(ext for ext in DUCKDB_EXTENSIONS if ext.count(".") == 1)
+_COMPOUND_EXTENSIONS = tuple(ext for ext in DUCKDB_EXTENSIONS if ext.count(".") > 1)
+
+def has_duckdb_extension(path: Path) -> bool:
+    return path.suffix.lower() in _SIMPLE_EXTENSIONS or path.name.lower().endswith(_COMPOUND_EXTENSIONS)
 
 def is_duckdb_file(path: Path) -> bool:
-    return path.is_file() and any(path.name.lower().endswith(ext) for ext in DUCKDB_EXTENSIONS)
+    # Check the name first so non-matching entries never cost a stat() call
+    return has_duckdb_extension(path) and path.is_file()
+
+# Starter query per file suffix; {p} is the file path, {t} the table name for Excel
+SQLITE_TEMPLATE = "INSTALL sqlite;\nLOAD sqlite;\nATTACH '{p}' AS sqlite_db (TYPE SQLITE);\nSHOW TABLES FROM sqlite_db;"
+# Excel files will be loaded via pandas and registered as DuckDB table
+EXCEL_TEMPLATE = "-- Excel file: {p}\nSELECT * FROM {t} LIMIT 100;"
+CSV_TEMPLATE = "SELECT * FROM read_csv_auto('{p}') LIMIT 100;"
+JSON_TEMPLATE = "SELECT * FROM read_json_auto('{p}') LIMIT 100;"
+SQL_TEMPLATES = {
+    ".duckdb": "ATTACH '{p}' AS other;\nSHOW TABLES;",
+    ".sqlite": SQLITE_TEMPLATE, ".sqlite3": SQLITE_TEMPLATE, ".db": SQLITE_TEMPLATE,
+    ".xlsx": EXCEL_TEMPLATE, ".xls": EXCEL_TEMPLATE,
+    ".csv": CSV_TEMPLATE,
+    ".json": JSON_TEMPLATE, ".jsonl": JSON_TEMPLATE,
+}
+DEFAULT_SQL_TEMPLATE = "SELECT * FROM '{p}' LIMIT 100;"
 
 def sql_for_file(path: Path) -> str:
-    p, s = path.as_posix(), path.suffix.lower()
-    if s == ".duckdb": return f"ATTACH '{p}' AS other;\nSHOW TABLES;"
-    if s in {".sqlite", ".sqlite3", ".db"}:
-        return f"INSTALL sqlite;\nLOAD sqlite;\nATTACH '{p}' AS sqlite_db (TYPE SQLITE);\nSHOW TABLES FROM sqlite_db;"
-    if s in {".xlsx", ".xls"}: 
-        # Excel files will be loaded via pandas and registered as DuckDB table
-        table_name = path.stem.replace(' ', '_').replace('-', '_')
-        return f"-- Excel file: {p}\nSELECT * FROM {table_name} LIMIT 100;"
-    if s in {".csv", ".csv.gz"}: return f"SELECT * FROM read_csv_auto('{p}') LIMIT 100;"
-    if s in {".json", ".jsonl"}: return f"SELECT * FROM read_json_auto('{p}') LIMIT 100;"
-    return f"SELECT * FROM '{p}' LIMIT 100;"
+    template = SQL_TEMPLATES.get(path.suffix.lower(), DEFAULT_SQL_TEMPLATE)
+    return template.format(p=path.as_posix(), t=path.stem.replace(' ', '_').replace('-', '_'))
+
+def collect_sql_refs(node, tables: set, functions: set, ctes: set):
+    """Walk a json_serialize_sql tree, collecting table references, table functions and CTE names."""
+    if isinstance(node, list):
+        for child in node:
+            collect_sql_refs(child, tables, functions, ctes)
+        return
+    if not isinstance(node, dict):
+        return
+    kind = node.get("type")
+    if kind == "BASE_TABLE":
+        tables.add((node["catalog_name"].lower(), node["schema_name"].lower(), node["table_name"].lower()))
+    elif kind == "TABLE_FUNCTION":
+        functions.add(node["function"].get("function_name", "").lower())
+    for entry in (node.get("cte_map") or {}).get("map", ()):
+        ctes.add(entry["key"].lower())
+    for child in node.values():
+        if isinstance(child, (dict, list)):
+            collect_sql_refs(child, tables, functions, ctes)
+
+def column_array(values: list) -> pa.Array:
+    """Arrow array for one column of driver values; mixed-type columns fall back to text."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. an MSSQL sql_variant column holding both ints and strings
+        return pa.array([None if v is None else str(v) for v in values], pa.string())
+
+def columns_to_table(cols: list, columns: list) -> pa.Table:
+    """Build an Arrow table from one Python value list per column."""
+    return pa.Table.from_arrays([column_array(values) for values in columns], names=cols)
+
+def rows_to_table(cols: list, rows: list) -> pa.Table:
+    """Build an Arrow table from driver rows (used for non-DuckDB sources)."""
+    columns = [list(values) for values in zip(*rows)] if rows else [[] for _ in cols]
+    return columns_to_table(cols, columns)
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+def excel_values(column: pa.Array) -> list:
+    """Python values of column for a spreadsheet; types Excel has no cell for become text."""
+    values = column.to_pylist()
+    t = column.type
+    if (pa.types.is_nested(t) or pa.types.is_interval(t) or pa.types.is_binary(t)
+            or pa.types.is_large_binary(t) or pa.types.is_fixed_size_binary(t)):
+        return [None if v is None else str(v) for v in values]
+    return values
+
+# Parsed openduck.json keyed by the (mtime_ns, size) it was read at
+_config_cache = {"key": None, "data": None}
+
+def config_file_key():
+    """Identify the current openduck.json contents by modification time and size, None if missing"""
+    try:
+        st = CONFIG_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 def load_config():
-    """Load config from openduck.json, create if doesn't exist"""
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            if "connections" not in config:
-                config["connections"] = []
-            return config
+    """Load config from openduck.json (history from openduck.history.jsonl), create if doesn't exist"""
+    # The stat for the cache key doubles as the existence check
+    key = config_file_key()
+    if key is not None:
+        if _config_cache["key"] == key:
+            config = copy.deepcopy(_config_cache["data"])
+        else:
+            config = json_loads(CONFIG_FILE.read_bytes())
+            _config_cache.update(key=key, data=copy.deepcopy(config))
+        if "connections" not in config:
+            config["connections"] = []
+        legacy_history = config.pop("history", None)
+        if legacy_history is not None:
+            # Move history kept by older versions into the JSONL file once
+            if legacy_history and not HISTORY_FILE.exists():
+                append_history(legacy_history)
+            save_config(config)
     else:
-        default_config = {
-            "history": [],
+        config = {
             "saved_queries": [],
             "connections": []
         }
-        save_config(default_config)
-        return default_config
+        save_config(config)
+    config["history"] = load_history()
+    return config
 
 def save_config(config):
-    """Save config to openduck.json"""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    """Save config to openduck.json (history is stored separately)"""
+    data = {key: value for key, value in config.items() if key != "history"}
+    cached_key = _config_cache["key"]
+    if cached_key is not None and _config_cache["data"] == data and config_file_key() == cached_key:
+        # Identical to what is on disk already
+        return
+    # Write a sibling file and swap it in, so a crash never leaves a half-written config
+    tmp = CONFIG_FILE.with_suffix(".json.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(json_dumps(data, indent=True))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CONFIG_FILE)
+    # What was just written is what the next load would parse
+    _config_cache.update(key=config_file_key(), data=copy.deepcopy(data))
+
+def load_history() -> list:
+    """Read the last HISTORY_LIMIT entries from the history file"""
+    try:
+        f = open(HISTORY_FILE, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty file, or a filesystem that can't be mapped
+            data = f.read()
+        # Walk back from the end so only the kept lines are ever touched and parsed
+        lines = []
+        end = len(data)
+        while end > 0 and len(lines) < HISTORY_LIMIT:
+            newline = data.rfind(b"\n", 0, end)
+            line = data[newline + 1:end]
+            if line.strip():
+                lines.append(line)
+            end = max(newline, 0)
+        size = len(data)
+        if isinstance(data, mmap.mmap):
+            data.close()
+    history = []
+    kept = []
+    for line in reversed(lines):
+        try:
+            history.append(json_loads(line))
+            kept.append(line)
+        except ValueError as e:
+            # A crash mid-append can leave a truncated last line; skip it rather than fail startup
+            logging.debug(f"Skipping unreadable history line: {e}")
+    if size > HISTORY_COMPACT_BYTES:
+        compact_history(kept)
+    return history
+
+def compact_history(lines: list):
+    """Rewrite the history file to hold only lines"""
+    tmp = HISTORY_FILE.with_suffix(".jsonl.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.writelines(line.rstrip(b"\r") + b"\n" for line in lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, HISTORY_FILE)
+    except OSError as e:
+        logging.debug(f"Could not compact history file: {e}")
+
+def append_history(entries: list):
+    """Append history entries to the history file, one JSON object per line"""
+    with open(HISTORY_FILE, 'a+b') as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Don't glue the new entry onto a truncated last line
+                f.write(b"\n")
+        f.writelines(json_dumps(entry) + b"\n" for entry in entries)
+
+def history_entry(sql: str) -> dict:
+    """Build a history record for sql"""
+    return {
+        "sql": sql.strip(),
+        "timestamp": datetime.now().isoformat()
+    }
 
 def add_to_history(sql: str):
-    """Add a query to history in the config file"""
-    config = load_config()
-    timestamp = datetime.now().isoformat()
-    config["history"].append({
-        "sql": sql.strip(),
-        "timestamp": timestamp
-    })
-    # Unlimited history - no limit applied
-    save_config(config)
-    return config  # Return updated config for potential use by caller
-
-def save_query(name: str, sql: str):
-    """Save a query with a name to the config file"""
-    config = load_config()
-    timestamp = datetime.now().isoformat()
-    # Check if query with same name already exists and update it
-    for i, query in enumerate(config["saved_queries"]):
-        if query["name"] == name:
-            config["saved_queries"][i] = {
-                "name": name,
-                "sql": sql.strip(),
-                "timestamp": timestamp
-            }
-            save_config(config)
-            return config
-    # If not found, add as new query
-    config["saved_queries"].append({
+    """Add a query to the history file"""
+    entry = history_entry(sql)
+    append_history([entry])
+    return entry
+
+# Per key field: the config list last indexed and its value -> position index
+_record_indexes = {}
+
+def record_position(records: list, field: str, value) -> Optional[int]:
+    """Position of the record whose field equals value, via an index rebuilt only when stale"""
+    records_seen, positions = _record_indexes.get(field, (None, {}))
+    if records_seen is not records or len(positions) != len(records):
+        positions = {r[field]: i for i, r in enumerate(records)}
+        _record_indexes[field] = (records, positions)
+    i = positions.get(value)
+    if i is not None and (i >= len(records) or records[i][field] != value):
+        # List was changed behind our back; rebuild once
+        del _record_indexes[field]
+        return record_position(records, field, value)
+    return i
+
+def append_record(records: list, field: str, record: dict):
+    """Append record, keeping the index for field current"""
+    records.append(record)
+    records_seen, positions = _record_indexes.get(field, (None, {}))
+    if records_seen is records:
+        positions[record[field]] = len(records) - 1
+
+def saved_query_position(queries: list, name: str) -> Optional[int]:
+    """Position of the saved query called name"""
+    return record_position(queries, "name", name)
+
+def save_query(name: str, sql: str, config: dict = None):
+    """Save a query with a name to the config file (or to the given in-memory config, which the caller persists)"""
+    persist = config is None
+    if persist:
+        config = load_config()
+    queries = config["saved_queries"]
+    entry = {
         "name": name,
         "sql": sql.strip(),
-        "timestamp": timestamp
-    })
-    save_config(config)
+        "timestamp": datetime.now().isoformat()
+    }
+    # Update in place if a query with the same name already exists
+    i = saved_query_position(queries, name)
+    if i is not None:
+        queries[i] = entry
+    else:
+        append_record(queries, "name", entry)
+    if persist:
+        save_config(config)
     return config
 
-def save_connection(conn_info: dict):
-    """Save a database connection to config"""
-    config = load_config()
-    for i, c in enumerate(config["connections"]):
-        if c["id"] == conn_info["id"]:
-            config["connections"][i] = conn_info
-            save_config(config)
-            return config
-    config["connections"].append(conn_info)
-    save_config(config)
+def save_connection(conn_info: dict, config: dict = None):
+    """Save a database connection to config (an in-memory config passed in is persisted by the caller)"""
+    persist = config is None
+    if persist:
+        config = load_config()
+    connections = config["connections"]
+    i = record_position(connections, "id", conn_info["id"])
+    if i is not None:
+        connections[i] = conn_info
+    else:
+        append_record(connections, "id", conn_info)
+    if persist:
+        save_config(config)
     return config
 
-def delete_connection(conn_id: str):
-    """Delete a database connection from config"""
-    config = load_config()
-    config["connections"] = [c for c in config["connections"] if c["id"] != conn_id]
-    save_config(config)
+def delete_connection(conn_id: str, config: dict = None):
+    """Delete a database connection from config (an in-memory config passed in is persisted by the caller)"""
+    persist = config is None
+    if persist:
+        config = load_config()
+    connections = config["connections"]
+    i = record_position(connections, "id", conn_id)
+    if i is None:
+        # Nothing to delete, so nothing to write
+        return config
+    del connections[i]
+    _record_indexes.pop("id", None)
+    if persist:
+        save_config(config)
     return config
 
 # =====================
@@ -148,6 +405,12 @@ def delete_connection(conn_id: str):
 MATRIX_CHARS = "ｱｲｳｴｵｶｷｸｹｺｻｼｽｾｿﾀﾁﾂﾃﾄﾅﾆﾇﾈﾉ0123456789"
 # ANSI 256: 82=#87ff00, 46=#00ff00, 40=#00d700, 34=#00af00, 28=#008700, 22=#005f00
 MATRIX_SHADES = ["#87ff00", "#00ff00", "#00d700", "#00af00", "#008700", "#005f00"]
+# Marks an empty cell in MatrixScreen's character index grid
+MATRIX_BLANK = 255
+# Fastest Matrix frame interval; slower frames stretch it so drawing stays under ~1/3 of the time
+MATRIX_FRAME = 0.03
+# Character index -> glyph, with every unused index (including MATRIX_BLANK) a space
+MATRIX_GLYPHS = np.array(list(MATRIX_CHARS) + [" "] * (256 - len(MATRIX_CHARS)), dtype=object)
 
 class MatrixScreen(ModalScreen):
     DEFAULT_CSS = """
@@ -156,9 +419,12 @@ class MatrixScreen(ModalScreen):
     """
     def __init__(self):
         super().__init__()
-        self._drops = []
-        self._grid = []
-        self._colors = []
+        # One head row per column, plus rows x cols grids of indices into
+        # MATRIX_CHARS (MATRIX_BLANK if empty) and MATRIX_SHADES
+        self._drops = np.zeros(0, np.int32)
+        self._char_idx = np.full((0, 0), MATRIX_BLANK, np.uint8)
+        self._color_idx = np.zeros((0, 0), np.uint8)
+        self._rng = np.random.default_rng()
         self._timer = None
 
     def compose(self) -> ComposeResult:
@@ -167,54 +433,80 @@ class MatrixScreen(ModalScreen):
     def on_mount(self) -> None:
         cols = self.screen.size.width
         rows = self.screen.size.height
-        self._drops = [random.randint(0, rows) for _ in range(cols)]
+        self._drops = self._rng.integers(0, rows + 1, cols, dtype=np.int32)
         # Persistent grid - characters stay until overwritten
-        self._grid = [[" "] * cols for _ in range(rows)]
-        self._colors = [["#005f00"] * cols for _ in range(rows)]
-        self._timer = self.set_interval(0.03, self._tick)
+        self._char_idx = np.full((rows, cols), MATRIX_BLANK, np.uint8)
+        self._color_idx = np.zeros((rows, cols), np.uint8)
+        self._start()
+
+    def _start(self) -> None:
+        if self._timer is None:
+            self._timer = self.set_timer(MATRIX_FRAME, self._tick)
+
+    def on_screen_suspend(self) -> None:
+        # Nothing is visible under another screen, so don't animate
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
+
+    def on_screen_resume(self) -> None:
+        self._start()
+
+    def _resize(self, rows: int, cols: int) -> None:
+        """Resize the grids to the terminal, keeping the overlapping part."""
+        old_rows, old_cols = self._char_idx.shape
+        r, c = min(rows, old_rows), min(cols, old_cols)
+        char_idx = np.full((rows, cols), MATRIX_BLANK, np.uint8)
+        color_idx = np.zeros((rows, cols), np.uint8)
+        char_idx[:r, :c] = self._char_idx[:r, :c]
+        color_idx[:r, :c] = self._color_idx[:r, :c]
+        drops = np.zeros(cols, np.int32)
+        drops[:c] = self._drops[:c]
+        self._char_idx, self._color_idx, self._drops = char_idx, color_idx, drops
 
     def _tick(self) -> None:
+        start = time.perf_counter()
         cols = self.screen.size.width
         rows = self.screen.size.height
         # Resize grids if terminal changed
-        while len(self._drops) < cols:
-            self._drops.append(0)
-        self._drops = self._drops[:cols]
-        while len(self._grid) < rows:
-            self._grid.append([" "] * cols)
-            self._colors.append(["#005f00"] * cols)
-        self._grid = self._grid[:rows]
-        self._colors = self._colors[:rows]
-        for r in range(rows):
-            while len(self._grid[r]) < cols:
-                self._grid[r].append(" ")
-                self._colors[r].append("#005f00")
-            self._grid[r] = self._grid[r][:cols]
-            self._colors[r] = self._colors[r][:cols]
+        if self._char_idx.shape != (rows, cols):
+            self._resize(rows, cols)
         # Draw drops - characters persist on the grid like the original
-        for i in range(cols):
-            if random.random() > 0.97:
-                self._drops[i] = 0
-            for j, shade in enumerate(MATRIX_SHADES):
-                y = self._drops[i] - j
-                if 0 <= y < rows:
-                    self._grid[y][i] = random.choice(MATRIX_CHARS)
-                    self._colors[y][i] = shade
-            self._drops[i] += 1
-            if self._drops[i] >= rows:
-                self._drops[i] = 0
-        # Render
-        lines = []
-        for r in range(rows):
-            parts = []
-            for c in range(cols):
-                ch = self._grid[r][c]
-                if ch != " ":
-                    parts.append(f"[{self._colors[r][c]}]{ch}[/]")
-                else:
-                    parts.append(" ")
-            lines.append("".join(parts))
-        self.query_one("#matrix-canvas").update("\n".join(lines))
+        self._drops[self._rng.random(cols) > 0.97] = 0
+        col_ids = np.arange(cols)
+        new_chars = self._rng.integers(0, len(MATRIX_CHARS), (len(MATRIX_SHADES), cols), dtype=np.uint8)
+        for j in range(len(MATRIX_SHADES)):
+            ys = self._drops - j
+            valid = (ys >= 0) & (ys < rows)
+            y, x = ys[valid], col_ids[valid]
+            self._char_idx[y, x] = new_chars[j, valid]
+            self._color_idx[y, x] = j
+        self._drops += 1
+        self._drops[self._drops >= rows] = 0
+        if rows and cols:
+            self.query_one("#matrix-canvas").update(self._render_content())
+        # Reschedule rather than use a fixed interval, so large terminals can't back up the event loop
+        elapsed = time.perf_counter() - start
+        self._timer = self.set_timer(max(MATRIX_FRAME, elapsed * 3), self._tick)
+
+    def _render_content(self) -> Content:
+        """Build the canvas as plain text plus one color span per run of equal shade.
+
+        Constructing Content directly skips Textual's markup parser, which
+        otherwise dominates the frame time.
+        """
+        rows = self._char_idx.shape[0]
+        text = "\n".join("".join(row) for row in MATRIX_GLYPHS[self._char_idx].tolist())
+        # Shade per text position, MATRIX_BLANK for spaces and the newline ending each row
+        shade = np.where(self._char_idx == MATRIX_BLANK, MATRIX_BLANK, self._color_idx)
+        shade = np.hstack([shade, np.full((rows, 1), MATRIX_BLANK, np.uint8)]).ravel()[:-1]
+        bounds = np.flatnonzero(np.diff(shade)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [shade.size]))
+        colored = shade[starts] != MATRIX_BLANK
+        spans = [Span(start, end, MATRIX_SHADES[color]) for start, end, color in
+                 zip(starts[colored].tolist(), ends[colored].tolist(), shade[starts][colored].tolist())]
+        return Content(text, spans)
 
     def on_key(self) -> None:
         if self._timer:
@@ -241,20 +533,22 @@ LOLCAT_COLORS = [
     "#8800ff", "#cc00ff", "#ff00ff", "#ff0088",
 ]
 
-def lolcat(text: str) -> str:
+def lolcat(text: str) -> Text:
     """Apply rainbow colors to text, Rich markup style."""
-    from rich.text import Text
-    rich_text = Text(text)
-    lines = text.split("\n")
+    # The color changes every column, so each visible char gets its own span;
+    # collecting them first builds the Text once instead of stylizing char by char
+    spans = []
     pos = 0
-    for row, line in enumerate(lines):
+    for row, line in enumerate(text.split("\n")):
         for col, ch in enumerate(line):
             if ch != " ":
-                color = LOLCAT_COLORS[(col + row * 3) % len(LOLCAT_COLORS)]
-                rich_text.stylize(color, pos, pos + 1)
+                spans.append(TextSpan(pos, pos + 1, LOLCAT_COLORS[(col + row * 3) % len(LOLCAT_COLORS)]))
             pos += 1
         pos += 1  # newline
-    return rich_text
+    return Text(text, spans=spans)
+
+# Colored once; the About dialog reuses it on every open
+LOGO_LOLCAT = lolcat(LOGO_RAW)
 
 DUCK_ART = r"""                  (o.                   H
       _o)         |  . :             (o]H
@@ -269,7 +563,7 @@ class AboutScreen(ModalScreen):
     def compose(self) -> ComposeResult:
         with Middle():
             with Vertical(id="about-inner"):
-                yield Static(lolcat(LOGO_RAW), id="about-title")
+                yield Static(LOGO_LOLCAT, id="about-title")
                 yield Static("────────────────────────────────────────────────────")
                 yield Static("[b]GitHub:[/b] github.com/bertatron/duckcli")
                 yield Static("[b]Author:[/b] Bertatron")
@@ -282,19 +576,10 @@ class AboutScreen(ModalScreen):
     def on_key(self) -> None: self.dismiss()
 
     def on_click(self, event: Click) -> None:
-        if hasattr(event, 'widget') and event.widget and event.widget.id == "easter-egg":
-            self.dismiss()
+        widget = event.widget or self.screen.get_widget_at(event.screen_x, event.screen_y)[0]
+        self.dismiss()
+        if widget.id == "easter-egg":
             self.app.push_screen(MatrixScreen())
-        else:
-            try:
-                widget, _ = self.screen.get_widget_at(event.screen_x, event.screen_y)
-                if widget.id == "easter-egg":
-                    self.dismiss()
-                    self.app.push_screen(MatrixScreen())
-                    return
-            except Exception:
-                pass
-            self.dismiss()
 
 class ResizeHandle(Static):
     """A draggable handle to resize the sidebar."""
@@ -334,7 +619,16 @@ class ResizeHandle(Static):
 
 class DuckTree(DirectoryTree):
     def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
-        return [p for p in paths if p.is_dir() or is_duckdb_file(p)]
+        shown = []
+        for p in paths:
+            # One stat() per entry answers both "directory?" and "regular file?"
+            try:
+                mode = p.stat().st_mode
+            except OSError:
+                continue
+            if stat.S_ISDIR(mode) or (stat.S_ISREG(mode) and has_duckdb_extension(p)):
+                shown.append(p)
+        return shown
 
 class DatabaseTree(Vertical):
     """Tree widget showing database connections and their tables with search functionality."""
@@ -342,6 +636,15 @@ class DatabaseTree(Vertical):
     def __init__(self):
         super().__init__(id="db-tree")
         self.connections_data = {}
+        # Per connection: its node, its sorted table names with their lowercase forms,
+        # and the leaves now shown by table name
+        self.conn_nodes = {}
+        self.tables = {}
+        self.table_nodes = {}
+        self.search_term = ""
+        self._filter_timer = None
+        # The '+ Add connection' leaf; connection nodes are inserted before it
+        self.add_node = None
         self.original_tree = Tree("Databases", id="db-tree-inner")
         self.search_input = Input(placeholder="Search tables...", id="db-search-input")
         
@@ -351,15 +654,7 @@ class DatabaseTree(Vertical):
         
     def on_mount(self):
         self.original_tree.root.expand()
-        self._ensure_add_node()
-        
-    def _ensure_add_node(self):
-        """Make sure the '+ Add connection' node is always the last leaf."""
-        # Remove existing add-node if present
-        for child in list(self.original_tree.root.children):
-            if child.data and child.data.get("type") == "add_connection":
-                child.remove()
-        self.original_tree.root.add_leaf("+ Add connection", data={"type": "add_connection"})
+        self.add_node = self.original_tree.root.add_leaf("+ Add connection", data={"type": "add_connection"})
 
     def add_connection_node(self, conn_info: dict, tables: list = None):
         conn_id = conn_info["id"]
@@ -371,68 +666,86 @@ class DatabaseTree(Vertical):
             label,
             data={"type": "connection", "conn_id": conn_id},
             expand=True,
+            before=self.add_node,
         )
+        self.conn_nodes[conn_id] = conn_node
         if tables:
-            for table_name in sorted(tables):
-                conn_node.add_leaf(
-                    f"  {table_name}",
-                    data={"type": "table", "conn_id": conn_id, "table": table_name, "database": conn_info["database"]},
-                )
+            names = sorted(tables)
+            # Lowercased once here rather than for every table on every search
+            self.tables[conn_id] = (names, [name.lower() for name in names])
+            self.table_nodes[conn_id] = {}
+            self._show_matching_tables(conn_id)
         else:
             conn_node.add_leaf("Loading...", data={"type": "loading", "conn_id": conn_id})
-        self._ensure_add_node()
+
+    def add_error_node(self, conn_info: dict, message: str):
+        """Show a failed connection in place of its node, with the error beneath it."""
+        conn_id = conn_info["id"]
+        self.remove_connection_node(conn_id)
+        err_node = self.original_tree.root.add(
+            f"[red]ERR: {conn_info['display_name']}[/red]",
+            data={"type": "error", "conn_id": conn_id},
+            before=self.add_node,
+        )
+        err_node.add_leaf(f"[red]{message[:60]}[/red]")
+        self.conn_nodes[conn_id] = err_node
 
     def remove_connection_node(self, conn_id: str):
-        for child in list(self.original_tree.root.children):
-            if child.data and child.data.get("conn_id") == conn_id:
-                child.remove()
-                break
+        node = self.conn_nodes.pop(conn_id, None)
+        if node is not None:
+            node.remove()
         self.connections_data.pop(conn_id, None)
-        self._ensure_add_node()
+        self.tables.pop(conn_id, None)
+        self.table_nodes.pop(conn_id, None)
 
     def filter_tables(self, search_term: str):
         """Filter the tree to show only tables that match the search term."""
         search_term = search_term.strip().lower()
-
-        # Clear the tree and rebuild with filtered content
-        self.original_tree.clear()
-
-        for conn_id, conn_info in self.connections_data.items():
-            type_icon = "\U0001f42c" if conn_info["type"] == "mysql" else "\U0001f537"
-            label = f"{type_icon} {conn_info['display_name']}"
-
-            # Filter tables based on search term (case insensitive)
-            all_tables = conn_info.get("tables", [])
-            if search_term:
-                # Case-insensitive search
-                filtered_tables = [table for table in all_tables if search_term in table.lower()]
-            else:
-                # Show all tables when search is empty
-                filtered_tables = all_tables
-
-            # Always add the connection node, but with filtered tables
-            conn_node = self.original_tree.root.add(
-                label,
-                data={"type": "connection", "conn_id": conn_id},
-                expand=True,
-            )
-            
-            # Add tables based on filtering
-            for table_name in sorted(filtered_tables):
-                conn_node.add_leaf(
+        if search_term == self.search_term:
+            return
+        self.search_term = search_term
+        # One repaint for all connections' leaf changes
+        with self.app.batch_update():
+            for conn_id in self.tables:
+                self._show_matching_tables(conn_id)
+            self.original_tree.root.expand()
+
+    def schedule_filter(self, search_term: str):
+        """Filter once typing pauses, so a burst of keystrokes costs a single pass."""
+        if self._filter_timer:
+            self._filter_timer.stop()
+        self._filter_timer = self.set_timer(SEARCH_DEBOUNCE, lambda: self.filter_tables(search_term))
+
+    def _show_matching_tables(self, conn_id: str):
+        """Add and remove only the table leaves whose match against the search term changed."""
+        conn_info = self.connections_data[conn_id]
+        conn_node = self.conn_nodes[conn_id]
+        shown = self.table_nodes[conn_id]
+        all_tables, lowered = self.tables[conn_id]
+        if self.search_term:
+            # Case-insensitive search
+            matching = [table for table, lower in zip(all_tables, lowered) if self.search_term in lower]
+        else:
+            matching = all_tables
+        # The "No matching tables" leaf is kept under the None key
+        keep = set(matching)
+        if self.search_term and not matching:
+            keep.add(None)
+        for table_name in [name for name in shown if name not in keep]:
+            shown.pop(table_name).remove()
+        # Both lists are sorted, so position i is where a newly matching table belongs
+        for i, table_name in enumerate(matching):
+            if table_name not in shown:
+                shown[table_name] = conn_node.add_leaf(
                     f"  {table_name}",
                     data={"type": "table", "conn_id": conn_id, "table": table_name, "database": conn_info["database"]},
+                    before=i,
                 )
-            
-            # If search term exists but no tables match, add a "No matches" indicator
-            if search_term and not filtered_tables:
-                conn_node.add_leaf(
-                    "  No matching tables",
-                    data={"type": "no_match", "conn_id": conn_id},
-                )
-
-        self._ensure_add_node()
-        self.original_tree.root.expand()
+        if None in keep and None not in shown:
+            shown[None] = conn_node.add_leaf(
+                "  No matching tables",
+                data={"type": "no_match", "conn_id": conn_id},
+            )
 
     def update_tables(self, conn_id: str, tables: list):
         conn_info = self.connections_data.get(conn_id)
@@ -440,13 +753,36 @@ class DatabaseTree(Vertical):
             self.add_connection_node(conn_info, tables)
 
 
+class ResultsTable(DataTable):
+    """DataTable that asks for more rows when scrolled near its last loaded row."""
+
+    class NearEnd(Message):
+        def __init__(self, table: "ResultsTable"):
+            super().__init__()
+            self.table = table
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if new_value >= self.max_scroll_y - self.size.height:
+            self.post_message(self.NearEnd(self))
+
 class QueryTab(Vertical):
     def __init__(self, sql: str = "", connection_id: str = None):
         super().__init__()
         self.initial_sql = sql
-        self.full_data, self.column_names, self.col_states = [], [], {}
+        self.result, self.column_names, self.col_states = None, [], {}
+        # Cursor queries run on; reused across runs so tab-local TEMP objects persist
+        self.cursor = None
+        # Cursor holding the registered result; filter/sort pages stream from it
+        self.view_cursor = None
+        self.rendered_rows, self.view_done = 0, True
+        self.columns_changed = False
+        # Long-lived thread that owns this tab's query cursor
+        self.executor = None
         self.running_task = None
         self.connection_id = connection_id
+        # Child widgets, kept as they are composed so handlers needn't query the DOM
+        self.editor = self.table = self.meta_bar = self.memory_bar = None
 
     def compose(self) -> ComposeResult:
         text_area = TextArea(
@@ -464,23 +800,88 @@ class QueryTab(Vertical):
             text_area.language = "sql"
         except Exception:
             pass
+        self.editor = text_area
         yield text_area
         with Horizontal():  # Container for table and export sidebar
-            yield DataTable(id="results-table")
+            self.table = ResultsTable(id="results-table")
+            yield self.table
             with Vertical(id="export-sidebar"):
                 yield Button("↓CSV", id="export-csv", classes="export-btn")
                 yield Button("↓XLSX", id="export-excel", classes="export-btn")
                 yield Button("Abort", id="cancel-query", classes="export-btn", tooltip="Cancel Query", variant="error")
         with Horizontal(id="metadata-container"):
-            yield Static("Ready", id="metadata-bar")
-            yield Static("Memory: N/A", id="memory-bar")
+            self.meta_bar = Static("Ready", id="metadata-bar")
+            self.memory_bar = Static("Memory: N/A", id="memory-bar")
+            yield self.meta_bar
+            yield self.memory_bar
 
     def on_mount(self):
-        t = self.query_one(DataTable)
+        t = self.table
         t.cursor_type, t.zebra_stripes = "row", True
         # Gebruik een kleine vertraging voor focus om crashes te voorkomen
         self.set_timer(0.1, self.safe_focus)
 
+    def reset(self, sql: str, connection_id: str = None):
+        """Clear a pooled tab so it can be reused for a new query."""
+        self.result, self.column_names, self.col_states = None, [], {}
+        self.rendered_rows, self.view_done = 0, True
+        self.connection_id = connection_id
+        if self.cursor is not None:
+            # A fresh cursor so TEMP objects from the previous use don't leak in
+            self.app.drop_cached_results(self.cursor)
+            self.cursor.close()
+            self.cursor = None
+        if self.view_cursor is not None:
+            self.view_cursor.unregister(RESULT_VIEW)
+        self.table.clear(columns=True)
+        self.editor.text = sql
+        self.meta_bar.update("Ready")
+
+    def set_result(self, cols: list, table: pa.Table):
+        """Replace the tab's result and register it with DuckDB for filtering/sorting."""
+        self.column_names = cols
+        self.result = table
+        self.col_states = {i: {"filter": "", "sort": None} for i in range(len(cols))}
+        self.columns_changed = True
+        if self.view_cursor is None:
+            self.view_cursor = self.app.con.cursor()
+        # Positional names keep duplicate or empty headers addressable in SQL
+        self.view_cursor.register(RESULT_VIEW, table.rename_columns([f"c{i}" for i in range(len(cols))]))
+
+    def view_sql(self) -> tuple:
+        """SQL and parameters selecting the result with the current filters and sort.
+
+        Cells come back already formatted as display strings, converted a whole
+        column vector at a time by DuckDB rather than per cell in Python.
+        """
+        where, params, order, shown = [], [], "", []
+        for i, s in self.col_states.items():
+            as_text = f"coalesce(CAST(c{i} AS VARCHAR), 'NULL')"
+            # Left unaliased so ORDER BY c{i} still sorts on the typed column
+            shown.append(as_text)
+            if s["filter"]:
+                where.append(f"contains(lower({as_text}), ?)")
+                params.append(s["filter"].lower())
+            if s["sort"] and not order:
+                # Typed sort in DuckDB; NULLs pinned last whatever default_null_order is set to
+                order = f" ORDER BY c{i} {s['sort'].upper()} NULLS LAST"
+        sql = f"SELECT {', '.join(shown) or '*'} FROM {RESULT_VIEW}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + order, params
+
+    def on_unmount(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.cursor is not None:
+            self.app.drop_cached_results(self.cursor)
+        for cursor in (self.cursor, self.view_cursor):
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
     def safe_focus(self):
         """Focus de editor op een veilige manier."""
         try:
@@ -514,7 +915,8 @@ class SaveQueryDialog(ModalScreen):
         elif event.button.id == "btn-save":
             name = self.query_one("#query-name", Input).value
             if name.strip():
-                save_query(name, self.query_text)
+                save_query(name, self.query_text, self.app.config)
+                self.app.queue_config_save()
                 self.dismiss({"saved": True, "name": name})
             else:
                 self.query_one("#query-name").value = ""
@@ -531,68 +933,128 @@ class ExportDialog(ModalScreen):
             yield Static(f"Export {self.export_type.upper()}", id="export-modal-title")
             yield Input(placeholder="Enter filename...", id="export-filename")
             yield Static("Current query:", id="current-query-label")
-            yield Static(self.tab.query_one(TextArea).text[:100] + ("..." if len(self.tab.query_one(TextArea).text) > 100 else ""), id="current-query-preview")
+            yield Static(self.tab.editor.text[:100] + ("..." if len(self.tab.editor.text) > 100 else ""), id="current-query-preview")
             with Horizontal():
                 yield Button("Export", variant="primary", id="btn-export")
                 yield Button("Cancel", id="btn-cancel")
 
     def on_mount(self):
         # Pre-populate filename based on query content
-        query_text = self.tab.query_one(TextArea).text.strip()
-        import re
+        query_text = self.tab.editor.text.strip()
         # Extract table name from query if possible
-        table_match = re.search(r'FROM\s+(\w+)', query_text, re.IGNORECASE)
+        table_match = FROM_TABLE_RE.search(query_text)
         base_name = table_match.group(1) if table_match else "query_result"
         # Sanitize filename
-        base_name = re.sub(r'[^\w\-_]', '_', base_name)
+        base_name = UNSAFE_FILENAME_RE.sub('_', base_name)
         extension = ".csv" if self.export_type == "csv" else ".xlsx"
         default_filename = f"{base_name}{extension}"
         
         self.query_one("#export-filename").value = default_filename
         self.query_one("#export-filename").focus()
 
-    def on_button_pressed(self, event: Button.Pressed):
+    async def on_button_pressed(self, event: Button.Pressed):
         if event.button.id == "btn-cancel":
             self.dismiss()
         elif event.button.id == "btn-export":
             filename = self.query_one("#export-filename", Input).value
             if filename.strip():
+                # Writing can take a while for big results; keep the UI responsive
                 if self.export_type == "csv":
-                    self.export_to_csv(filename)
+                    await asyncio.to_thread(self.export_to_csv, filename)
                 else:  # excel
-                    self.export_to_excel(filename)
+                    await asyncio.to_thread(self.export_to_excel, filename)
                 self.dismiss({"exported": True, "filename": filename})
             else:
                 self.query_one("#export-filename").value = ""
                 self.query_one("#export-filename").focus()
 
+    def copy_result(self, filepath: Path, options: str):
+        """Write the tab's result to filepath with DuckDB COPY ... TO."""
+        # DuckDB streams the Arrow result straight to disk; a private cursor
+        # leaves the tab's paged view result untouched
+        cursor = self.tab.app.con.cursor()
+        try:
+            names = self.tab.column_names
+            cursor.register(RESULT_VIEW, self.tab.result.rename_columns([f"c{i}" for i in range(len(names))]))
+            columns = ", ".join(f'c{i} AS "' + name.replace('"', '""') + '"' for i, name in enumerate(names))
+            cursor.execute(f"COPY (SELECT {columns} FROM {RESULT_VIEW}) TO ? ({options})", [str(filepath)])
+        finally:
+            cursor.close()
+
     def export_to_csv(self, filename: str):
         """Export table data to CSV file"""
-        import csv
-        filepath = CWD / filename
-        
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            # Write headers
-            writer.writerow(self.tab.column_names)
-            # Write data rows
-            for row in self.tab.full_data:
-                writer.writerow(row)
+        self.copy_result(CWD / filename, "HEADER, FORMAT CSV")
 
     def export_to_excel(self, filename: str):
         """Export table data to Excel file"""
+        filepath = CWD / filename
+        app = self.tab.app
+        # Prefer DuckDB's native xlsx writer; it needs the excel extension, which may not be installable offline
+        if app.excel_extension is None:
+            cursor = app.con.cursor()
+            try:
+                cursor.execute("INSTALL excel; LOAD excel")
+                app.excel_extension = True
+            except Exception as e:
+                # Only a failed install/load rules the extension out for the session
+                logging.debug(f"DuckDB excel extension unavailable, falling back to xlsxwriter: {e}")
+                app.excel_extension = False
+            finally:
+                cursor.close()
+        if app.excel_extension:
+            try:
+                self.copy_result(filepath, "FORMAT xlsx, HEADER true")
+                return
+            except Exception as e:
+                # e.g. a type the xlsx writer can't store; the fallback gets this export only,
+                # and reports path or permission errors itself
+                logging.warning(f"DuckDB xlsx export failed, falling back to xlsxwriter: {e}")
+        try:
+            self.write_xlsx(filepath)
+            return
+        except ImportError:
+            pass
         try:
             import pandas as pd
-            filepath = CWD / filename
             
-            # Create DataFrame from the data
-            df = pd.DataFrame(self.tab.full_data, columns=self.tab.column_names)
-            # Write to Excel
+            # Create DataFrame from the Arrow result (column buffers, no per-cell Python objects)
+            df = self.tab.result.to_pandas()
+            df.columns = self.tab.column_names
+            # Last resort when xlsxwriter is missing; pandas then writes with openpyxl
             df.to_excel(filepath, index=False)
         except ImportError:
             # Show error if pandas not available
             pass
 
+    def write_xlsx(self, filepath: Path):
+        """Stream the Arrow result into a workbook with xlsxwriter, one batch at a time."""
+        import xlsxwriter
+        # constant_memory flushes each row as it is written, so memory stays flat
+        workbook = xlsxwriter.Workbook(str(filepath), {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            "remove_timezone": True,
+            "nan_inf_to_errors": True,
+        })
+        try:
+            worksheet = workbook.add_worksheet()
+            worksheet.write_row(0, 0, self.tab.column_names)
+            row = 1
+            for batch in self.tab.result.to_batches():
+                for values in zip(*(excel_values(column) for column in batch.columns)):
+                    try:
+                        worksheet.write_row(row, 0, values)
+                    except TypeError:
+                        # Anything else xlsxwriter can't store goes in as text
+                        for col, value in enumerate(values):
+                            try:
+                                worksheet.write(row, col, value)
+                            except TypeError:
+                                worksheet.write_string(row, col, str(value))
+                    row += 1
+        finally:
+            workbook.close()
+
 class AddConnectionDialog(ModalScreen):
     """Modal dialog to add a MySQL or MSSQL connection."""
 
@@ -723,8 +1185,31 @@ class DuckCLI(App):
     def __init__(self):
         super().__init__()
         self.con = duckdb.connect()
+        # DuckDB defaults to one thread per core; past ~8 interactive queries gain
+        # little while competing with the UI thread
+        self.con.execute(f"SET threads = {min(8, os.cpu_count() or 4)}")
         self.config = load_config()
         self.db_connections: dict = {}
+        # In-memory catalog; only results read purely from its tables are cached
+        self.memory_db = self.con.execute("SELECT current_database()").fetchone()[0]
+        # (tab cursor, exact sql) -> (table, cols, duration), LRU ordered
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_bytes = 0
+        # Bumped on every invalidation; a result is only cached if none happened while it ran
+        self._result_cache_generation = 0
+        # sql text -> parsed duckdb.Statement list, LRU ordered; filled from worker threads
+        self._stmt_cache: OrderedDict = OrderedDict()
+        self._stmt_lock = threading.Lock()
+        # Pane ids of closed tabs kept hidden for reuse by add_new_tab
+        self._tab_pool = []
+        # Whether DuckDB's excel extension can be used for exports (None until first tried)
+        self.excel_extension = None
+        # Set once DuckDB's mysql extension has been installed and loaded
+        self.mysql_extension = False
+        # Coalesces config and history writes so they happen off the UI thread
+        self._io_queue: asyncio.Queue = asyncio.Queue()
+        self._config_dirty = False
+        self._pending_history = []
 
     def compose(self) -> ComposeResult:
         with Horizontal():
@@ -735,7 +1220,8 @@ class DuckCLI(App):
                 yield Tree("History", id="history-tree")
             yield ResizeHandle()
             with Vertical(id="main-content"):
-                yield TabbedContent(id="tabs")
+                self.tabs = TabbedContent(id="tabs")
+                yield self.tabs
         yield Header()
         yield Footer()
 
@@ -744,6 +1230,7 @@ class DuckCLI(App):
         self.load_saved_queries_list()
         self.load_saved_connections()
         self.set_interval(1.0, self.update_memory_info)
+        self.run_worker(self._io_worker(), group="config-io")
 
         sql = ""
         if self.config["history"]:
@@ -751,6 +1238,56 @@ class DuckCLI(App):
         # Delay adding the first tab slightly to allow UI to settle
         self.set_timer(0.2, lambda: self.run_worker(self.add_new_tab("Main", sql)))
 
+    def on_unmount(self):
+        # Don't lose history or config changes queued in the last coalescing window
+        if self._pending_history:
+            append_history(self._pending_history)
+            self._pending_history = []
+        if self._config_dirty:
+            save_config(self.config)
+            self._config_dirty = False
+
+    def queue_config_save(self):
+        """Ask the background writer to persist self.config."""
+        self._config_dirty = True
+        self._io_queue.put_nowait("config")
+
+    def queue_history_append(self, entry: dict):
+        """Ask the background writer to append entry to the history file."""
+        self._pending_history.append(entry)
+        self._io_queue.put_nowait("history")
+
+    async def _io_worker(self):
+        """Write history and config at most once per 100 ms burst of changes, in a thread."""
+        while True:
+            await self._io_queue.get()
+            await asyncio.sleep(0.1)
+            while not self._io_queue.empty():
+                self._io_queue.get_nowait()
+            if self._pending_history:
+                entries, self._pending_history = self._pending_history, []
+                try:
+                    await asyncio.to_thread(append_history, entries)
+                except Exception as e:
+                    logging.error(f"Error writing history: {e}")
+                    self._pending_history[:0] = entries
+            if not self._config_dirty:
+                continue
+            self._config_dirty = False
+            # Shallow snapshot so the UI can keep appending while we serialize
+            snapshot = {key: list(value) if isinstance(value, list) else value
+                        for key, value in self.config.items() if key != "history"}
+            try:
+                await asyncio.to_thread(save_config, snapshot)
+            except Exception as e:
+                logging.error(f"Error writing config: {e}")
+                self._config_dirty = True
+
+    def active_query_tab(self) -> Optional[QueryTab]:
+        """The QueryTab in the active pane, or None when no tab is open."""
+        pane = self.tabs.active_pane
+        return pane.query_one(QueryTab) if pane is not None else None
+
     def update_memory_info(self):
         """Update the memory info in the active tab's footer bar."""
         try:
@@ -760,10 +1297,9 @@ class DuckCLI(App):
             else:
                 mem_mb = mem / 1024
             
-            tabs = self.query_one("#tabs", TabbedContent)
-            if tabs.active:
-                tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-                mem_bar = tab.query_one("#memory-bar")
+            tab = self.active_query_tab()
+            if tab is not None:
+                mem_bar = tab.memory_bar
                 color = "red" if mem_mb > 2048 else "cyan"
                 mem_bar.update(f"Memory: [{color}]{mem_mb:.1f} MB[/{color}]")
         except Exception:
@@ -788,12 +1324,7 @@ class DuckCLI(App):
                 raise ValueError(f"Unknown type: {conn_info['type']}")
             db_tree.update_tables(conn_id, tables)
         except Exception as e:
-            db_tree.remove_connection_node(conn_id)
-            err_node = db_tree.root.add(
-                f"[red]ERR: {conn_info['display_name']}[/red]",
-                data={"type": "error", "conn_id": conn_id},
-            )
-            err_node.add_leaf(f"[red]{str(e)[:60]}[/red]")
+            db_tree.add_error_node(conn_info, str(e))
             self.db_connections.pop(conn_id, None)
 
     async def _connect_mysql(self, conn_info: dict) -> list:
@@ -807,15 +1338,15 @@ class DuckCLI(App):
             f"password={conn_info['password']}"
         )
         def do_attach():
-            self.con.execute("INSTALL mysql; LOAD mysql;")
-            try:
-                self.con.execute(f"DETACH {alias}")
-            except Exception:
-                pass
+            if not self.mysql_extension:
+                self.con.execute("INSTALL mysql; LOAD mysql;")
+                self.mysql_extension = True
+            self.con.execute(f"DETACH DATABASE IF EXISTS {alias}")
             self.con.execute(f"ATTACH '{attach_str}' AS {alias} (TYPE MYSQL)")
             result = self.con.execute(
-                f"SELECT table_name FROM information_schema.tables "
-                f"WHERE table_catalog = '{alias}'"
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_catalog = ?",
+                [alias],
             ).fetchall()
             return [row[0] for row in result]
         tables = await asyncio.to_thread(do_attach)
@@ -860,8 +1391,8 @@ class DuckCLI(App):
                     pass
         db_tree = self.query_one("#db-tree", DatabaseTree)
         db_tree.remove_connection_node(conn_id)
-        delete_connection(conn_id)
-        self.config = load_config()
+        delete_connection(conn_id, self.config)
+        self.queue_config_save()
 
     def action_disconnect_db(self):
         try:
@@ -875,9 +1406,15 @@ class DuckCLI(App):
             pass
 
     async def add_new_tab(self, name: str, sql: str, run: bool = False, connection_id: str = None):
-        tabs = self.query_one("#tabs", TabbedContent)
-        tab_id = f"t{int(datetime.now().timestamp() * 1000)}"
-        await tabs.add_pane(TabPane(f"{name} ✕", QueryTab(sql, connection_id=connection_id), id=tab_id))
+        tabs = self.tabs
+        if self._tab_pool:
+            tab_id = self._tab_pool.pop()
+            tabs.get_pane(tab_id).query_one(QueryTab).reset(sql, connection_id)
+            tabs.get_tab(tab_id).label = f"{name} ✕"
+            tabs.show_tab(tab_id)
+        else:
+            tab_id = f"t{int(datetime.now().timestamp() * 1000)}"
+            await tabs.add_pane(TabPane(f"{name} ✕", QueryTab(sql, connection_id=connection_id), id=tab_id))
         tabs.active = tab_id
         if run: self.set_timer(0.1, self.action_run_query)
 
@@ -932,41 +1469,112 @@ class DuckCLI(App):
         else:
             return f"❌ Error loading file: {file_path}\n\nDetails: {str(e)}"
 
-    async def action_run_query(self):
-        tabs = self.query_one("#tabs", TabbedContent)
-        if not tabs.active: 
+    def action_run_query(self):
+        tab = self.active_query_tab()
+        if tab is None: 
             logging.debug("No active tab found")
             return
-        tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-        sql = tab.query_one(TextArea).text.strip()
+        sql = tab.editor.text.strip()
         if not sql: 
             logging.debug("No SQL query to execute")
             return
+        if tab.running_task and not tab.running_task.is_finished:
+            # The tab's cursor can only run one statement at a time
+            logging.debug("Query already running in this tab")
+            return
 
         logging.debug(f"Executing query: {sql[:100]}{'...' if len(sql) > 100 else ''}")
         
-        # Update config after adding to history
-        add_to_history(sql)
-        self.config = load_config()  # Reload config to ensure it's up to date
-        self.load_history_list()  # Refresh the history list in UI
-
-        tbl = tab.query_one(DataTable)
-        meta = tab.query_one("#metadata-bar")
-        tbl.loading = True
-        meta.update("Executing...")
-
-        # Track this task so it can be cancelled
-        tab.running_task = asyncio.current_task()
-        logging.debug("Query execution started, task tracked")
-
+        # Record in memory now; the file is written by the background config writer
+        entry = history_entry(sql)
+        history = self.config["history"]
+        history.append(entry)
+        self.queue_history_append(entry)
+        # Newest first: only the new entry is added to the tree
+        self.add_history_node(entry, first=True)
+        if len(history) > HISTORY_LIMIT:
+            del history[0]
+            self.query_one("#history-tree", Tree).root.children[-1].remove()
+
+        tab.table.loading = True
+        tab.meta_bar.update("Executing...")
+
+        # A worker per query keeps the message pump free, so other tabs and Cancel stay live;
+        # the Worker is kept on the tab so it can be cancelled
+        tab.running_task = self.run_worker(self._run_query(tab, sql), group="query", exit_on_error=False)
+        logging.debug("Query execution started, worker tracked")
+
+    async def _run_query(self, tab: QueryTab, sql: str):
+        """Run sql for tab off the event loop and show its result."""
+        tbl = tab.table
+        meta = tab.meta_bar
         conn_id = tab.connection_id
         conn_meta = self.db_connections.get(conn_id) if conn_id else None
         logging.debug(f"Connection info: {conn_meta['type'] if conn_meta else 'None'}")
+        writes = False
+        progress_due = 0.0
+
+        def report_progress(count):
+            """Show the fetched row count, at most once per PROGRESS_INTERVAL."""
+            nonlocal progress_due
+            now = time.perf_counter()
+            if now >= progress_due:
+                progress_due = now + PROGRESS_INTERVAL
+                self.call_from_thread(meta.update, f"Fetching... {count} rows")
+
+        def fetch_rows(res, cols):
+            """Drain a DB-API cursor in FETCH_BATCH_SIZE chunks, showing the first chunk early.
+
+            Values are appended column-wise so row tuples are released batch by batch.
+            """
+            columns, count = [[] for _ in cols], 0
+            while True:
+                batch = res.fetchmany(FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                if not count and len(batch) == FETCH_BATCH_SIZE:
+                    # More rows are coming; let the user see the first ones now
+                    self.call_from_thread(self._show_first_batch, tab, cols, rows_to_table(cols, batch))
+                for column, values in zip(columns, zip(*batch)):
+                    column.extend(values)
+                count += len(batch)
+                report_progress(count)
+            return columns_to_table(cols, columns)
+
+        def fetch_arrow(res, cols):
+            """Drain a DuckDB result as Arrow record batches, showing the first batch early."""
+            # to_arrow_reader replaces the deprecated fetch_record_batch in newer DuckDB releases
+            to_reader = getattr(res, "to_arrow_reader", None) or res.fetch_record_batch
+            reader = to_reader(FETCH_BATCH_SIZE)
+            batches, count = [], 0
+            for batch in reader:
+                if not batches and batch.num_rows == FETCH_BATCH_SIZE:
+                    self.call_from_thread(self._show_first_batch, tab, cols, pa.Table.from_batches([batch]))
+                batches.append(batch)
+                count += batch.num_rows
+                report_progress(count)
+            return pa.Table.from_batches(batches, schema=reader.schema)
 
         def execute():
             start = time.perf_counter()
             logging.debug("Executing SQL query in thread")
             
+            if conn_meta and conn_meta["type"] == "mssql":
+                mssql_conn = conn_meta["connection"]
+                cursor = mssql_conn.cursor()
+                cursor.execute(sql)
+                if not cursor.description:
+                    logging.debug("Query returned no results (MS SQL)")
+                    return rows_to_table(["Info"], []), ["Info"], None, time.perf_counter() - start
+                cols = [d[0] for d in cursor.description]
+                data = fetch_rows(cursor, cols)
+                logging.debug(f"MS SQL query executed: {data.num_rows} rows, {len(cols)} columns")
+                return data, cols, None, time.perf_counter() - start
+
+            # Every DuckDB query in the tab, Excel loads included, runs on the tab's own cursor
+            if tab.cursor is None:
+                tab.cursor = self.con.cursor()
+            cursor = tab.cursor
             # Check if this is an Excel file query
             if sql.startswith("-- Excel file:"):
                 try:
@@ -979,60 +1587,69 @@ class DuckCLI(App):
                     # Read Excel file with pandas
                     df = pd.read_excel(file_path)
                     
-                    # Register as DuckDB table
-                    self.con.register(table_name, df)
+                    # Registered views are cursor-local; registering on the tab's cursor
+                    # keeps the sheet visible to later queries in this tab
+                    cursor.register(table_name, df)
                     logging.debug(f"Registered Excel data as table '{table_name}': {len(df)} rows, {len(df.columns)} columns")
                     
                     # Now execute the actual SELECT query
                     actual_sql = sql.split("\n")[1].strip()
                     logging.debug(f"Executing query on Excel table: {actual_sql}")
-                    res = self.con.execute(actual_sql)
+                    res = cursor.execute(actual_sql)
                     cols = [d[0] for d in res.description]
-                    data = [list(r) for r in res.fetchall()]
+                    data = fetch_arrow(res, cols)
                     duration = time.perf_counter() - start
-                    logging.debug(f"Excel query executed: {len(data)} rows, {len(cols)} columns")
+                    logging.debug(f"Excel query executed: {data.num_rows} rows, {len(cols)} columns")
                     return data, cols, None, duration
                 except Exception as e:
                     logging.error(f"Error loading Excel file: {str(e)}")
                     raise
-            
-            if conn_meta and conn_meta["type"] == "mssql":
-                mssql_conn = conn_meta["connection"]
-                cursor = mssql_conn.cursor()
-                cursor.execute(sql)
-                if not cursor.description:
-                    logging.debug("Query returned no results (MS SQL)")
-                    return [], ["Info"], None, time.perf_counter() - start
-                cols = [d[0] for d in cursor.description]
-                data = [list(r) for r in cursor.fetchall()]
-                logging.debug(f"MS SQL query executed: {len(data)} rows, {len(cols)} columns")
-                return data, cols, None, time.perf_counter() - start
-            else:
-                cursor = self.con.cursor()
-                res = cursor.execute(sql)
-                if not res.description:
-                    duration = time.perf_counter() - start
-                    logging.debug("Query returned no results (DuckDB)")
-                    return [], ["Info"], [["Success"]], duration
-                cols = [d[0] for d in res.description]
-                data = [list(r) for r in res.fetchall()]
+
+            res = None
+            for statement in self._parsed_statements(cursor, sql):
+                res = cursor.execute(statement)
+            if res is None or not res.description:
                 duration = time.perf_counter() - start
-                logging.debug(f"DuckDB query executed: {len(data)} rows, {len(cols)} columns")
-                return data, cols, None, duration
+                logging.debug("Query returned no results (DuckDB)")
+                return rows_to_table(["Info"], []), ["Info"], [["Success"]], duration
+            cols = [d[0] for d in res.description]
+            data = fetch_arrow(res, cols)
+            duration = time.perf_counter() - start
+            logging.debug(f"DuckDB query executed: {data.num_rows} rows, {len(cols)} columns")
+            return data, cols, None, duration
 
         try:
-            data, cols, _, duration = await asyncio.to_thread(execute)
-            tab.column_names = cols
-            tab.full_data = data
-            tab.col_states = {i: {"filter": "", "sort": None} for i in range(len(cols))}
-            logging.debug(f"Setting up table with {len(cols)} columns and {len(data)} rows")
-            self.refresh_tab_table(tab)
+            if tab.executor is None:
+                tab.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duckdb")
+            loop = asyncio.get_running_loop()
+            writes, cache_key = await loop.run_in_executor(tab.executor, self.classify_query, tab, sql, conn_meta)
+            if writes:
+                # Anything that might write invalidates every cached result
+                self.invalidate_result_cache()
+            generation = self._result_cache_generation
+            cached = self._result_cache.get(cache_key) if cache_key else None
+            if cached:
+                self._result_cache.move_to_end(cache_key)
+                data, cols, duration = cached
+                logging.debug("Serving query from result cache")
+            else:
+                data, cols, _, duration = await loop.run_in_executor(tab.executor, execute)
+                # A write that ran meanwhile may have changed what this query saw
+                if cache_key and generation == self._result_cache_generation:
+                    self.cache_result(cache_key, (data, cols, duration))
             conn_label = ""
             if conn_meta:
                 conn_label = f" | via {conn_meta['type'].upper()}"
-            meta.update(f"Rows: {len(data)} | Time: {duration:.4f}s{conn_label} | Finished: {datetime.now().strftime('%H:%M:%S')}")
-            logging.debug(f"Query completed successfully: {len(data)} rows in {duration:.4f}s")
-        except asyncio.CancelledError:
+            if cached:
+                conn_label += " | cached"
+            # Table and metadata bar change in the same repaint
+            with self.batch_update():
+                tab.set_result(cols, data)
+                logging.debug(f"Setting up table with {len(cols)} columns and {data.num_rows} rows")
+                self.refresh_tab_table(tab)
+                meta.update(f"Rows: {data.num_rows} | Time: {duration:.4f}s{conn_label} | Finished: {datetime.now().strftime('%H:%M:%S')}")
+            logging.debug(f"Query completed successfully: {data.num_rows} rows in {duration:.4f}s")
+        except (asyncio.CancelledError, duckdb.InterruptException):
             logging.debug("Query was cancelled")
             meta.update("Query cancelled")
         except Exception as e:
@@ -1041,22 +1658,8 @@ class DuckCLI(App):
             tbl.add_column("Error")
             
             # Try to extract file path from the SQL for better error messages
-            import re
-            file_path = ""
-            # Check for read_csv_auto, read_json_auto, or direct file references
-            csv_match = re.search(r"read_csv_auto\('([^']+)'\)", sql)
-            json_match = re.search(r"read_json_auto\('([^']+)'\)", sql)
-            file_match = re.search(r"FROM '([^']+)'", sql)
-            excel_match = re.search(r"Excel file: ([^\n]+)", sql)
-            
-            if csv_match:
-                file_path = csv_match.group(1)
-            elif json_match:
-                file_path = json_match.group(1)
-            elif file_match:
-                file_path = file_match.group(1)
-            elif excel_match:
-                file_path = excel_match.group(1)
+            # Check for read_csv_auto, read_json_auto, or direct file references; stop at the first hit
+            file_path = next((m.group(1) for m in (p.search(sql) for p in FILE_PATH_RES) if m), "")
             
             # Use classified error message if available
             error_message = self._classify_file_error(e, file_path) if file_path else str(e)
@@ -1064,35 +1667,133 @@ class DuckCLI(App):
             tbl.add_row(error_message)
             meta.update("Error occurred")
         finally:
+            if writes:
+                # Reads that ran while the write did may have been cached with old data
+                self.invalidate_result_cache()
             tbl.loading = False
-            tab.running_task = None  # Clear the running task reference
-            logging.debug("Query execution completed, task reference cleared")
+            tab.running_task = None  # Clear the running worker reference
+            logging.debug("Query execution completed, worker reference cleared")
+
+    def classify_query(self, tab: QueryTab, sql: str, conn_meta: Optional[dict]) -> tuple:
+        """(may write, cache key or None) for sql run in tab; runs in the tab's thread."""
+        if conn_meta and conn_meta["type"] == "mssql":
+            return False, None
+        if tab.cursor is None:
+            tab.cursor = self.con.cursor()
+        cursor = tab.cursor
+        try:
+            statements = self._parsed_statements(cursor, sql)
+        except duckdb.Error:
+            # Fails again when executed, without running anything
+            return False, None
+        # Writing CTEs, PIVOT and the like parse as non-SELECT statements
+        if any(statement.type != duckdb.StatementType.SELECT for statement in statements):
+            return True, None
+        if conn_meta or VOLATILE_SQL_RE.search(sql):
+            return False, None
+        try:
+            cacheable = self.reads_memory_tables_only(cursor, sql)
+        except duckdb.Error as e:
+            logging.debug(f"Could not resolve tables for caching: {e}")
+            cacheable = False
+        # Keyed on the tab's own cursor: its TEMP objects are tab-local
+        return False, (cursor, sql) if cacheable else None
+
+    def reads_memory_tables_only(self, cursor, sql: str) -> bool:
+        """True when sql reads nothing but base tables of the in-memory catalog.
+
+        Views, registered frames, files, attached databases and table functions other than
+        CACHEABLE_TABLE_FUNCTIONS can change without a write through this app.
+        """
+        parsed = json_loads(cursor.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0])
+        if parsed["error"]:
+            return False
+        tables, functions, ctes = set(), set(), set()
+        collect_sql_refs(parsed["statements"], tables, functions, ctes)
+        if functions - CACHEABLE_TABLE_FUNCTIONS:
+            return False
+        tables = {ref for ref in tables if ref[:2] != ("", "") or ref[2] not in ctes}
+        if not tables:
+            return True
+        known = cursor.execute(
+            "SELECT lower(database_name), lower(schema_name), lower(table_name) FROM duckdb_tables() "
+            "WHERE database_name IN (?, 'temp') AND current_database() = ?",
+            [self.memory_db, self.memory_db],
+        ).fetchall()
+        return all(
+            any(table == t and schema in ("", s) and catalog in ("", d) for d, s, t in known)
+            for catalog, schema, table in tables
+        )
+
+    def invalidate_result_cache(self):
+        """Drop every cached result."""
+        self._result_cache.clear()
+        self._result_cache_bytes = 0
+        self._result_cache_generation += 1
+
+    def drop_cached_results(self, cursor):
+        """Drop the cached results keyed on cursor, before it is closed."""
+        for key in [key for key in self._result_cache if key[0] is cursor]:
+            self._result_cache_bytes -= self._result_cache.pop(key)[0].nbytes
+
+    def cache_result(self, key: tuple, value: tuple):
+        """Keep a query result, evicting the least recently used past the count and size caps."""
+        size = value[0].nbytes
+        if size > RESULT_CACHE_BYTES:
+            return
+        previous = self._result_cache.pop(key, None)
+        if previous:
+            self._result_cache_bytes -= previous[0].nbytes
+        self._result_cache[key] = value
+        self._result_cache_bytes += size
+        while len(self._result_cache) > RESULT_CACHE_SIZE or self._result_cache_bytes > RESULT_CACHE_BYTES:
+            _, (table, _, _) = self._result_cache.popitem(last=False)
+            self._result_cache_bytes -= table.nbytes
+
+    def _parsed_statements(self, cursor, sql: str) -> list:
+        """Parsed DuckDB statements for sql, reused across runs of the same text.
+
+        Parsing happens on the calling tab's cursor, in that tab's thread, never on self.con.
+        """
+        with self._stmt_lock:
+            statements = self._stmt_cache.get(sql)
+            if statements is not None:
+                self._stmt_cache.move_to_end(sql)
+                return statements
+        statements = cursor.extract_statements(sql)
+        with self._stmt_lock:
+            self._stmt_cache[sql] = statements
+            if len(self._stmt_cache) > STATEMENT_CACHE_SIZE:
+                self._stmt_cache.popitem(last=False)
+        return statements
+
+    def _show_first_batch(self, tab: QueryTab, cols: list, table: pa.Table):
+        """Render the first fetched batch while the rest of the result streams in."""
+        tab.set_result(cols, table)
+        self.refresh_tab_table(tab)
+        tab.table.loading = False
 
     def action_save_query(self):
         """Save the current query with a name"""
-        tabs = self.query_one("#tabs", TabbedContent)
-        if not tabs.active: return
+        tab = self.active_query_tab()
+        if tab is None: return
         
-        tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-        sql = tab.query_one(TextArea).text.strip()
+        sql = tab.editor.text.strip()
         if not sql: return
         
         def handle_result(result):
             if result and result.get("saved"):
-                # Reload the config and refresh the UI
-                self.config = load_config()
-                self.load_saved_queries_list()
+                # self.config already holds the new query; only its tree leaf changes
+                self.update_saved_query_node(result["name"])
         
         self.push_screen(SaveQueryDialog(sql), handle_result)
 
     def load_query_in_current_tab(self, sql: str):
         """Load a query into the current active tab"""
-        tabs = self.query_one("#tabs", TabbedContent)
-        if not tabs.active: return
+        tab = self.active_query_tab()
+        if tab is None: return
         
-        tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-        textarea = tab.query_one(TextArea)
-        textarea.text = sql
+        tab.editor.text = sql
 
     def load_history_list(self):
         """Load history into the history tree"""
@@ -1101,11 +1802,18 @@ class DuckCLI(App):
         # Remove old children
         for child in list(tree.root.children):
             child.remove()
-        for i, item in enumerate(reversed(self.config["history"])):
-            timestamp = datetime.fromisoformat(item["timestamp"]).strftime("%H:%M:%S")
-            sql_preview = item["sql"][:50] + ("..." if len(item["sql"]) > 50 else "")
-            label = f"[{timestamp}] {sql_preview}"
-            tree.root.add_leaf(label, data={"type": "history", "sql": item["sql"]})
+        for item in reversed(self.config["history"]):
+            self.add_history_node(item)
+
+    def add_history_node(self, item: dict, first: bool = False):
+        """Add one history entry to the history tree, at the top if first"""
+        tree = self.query_one("#history-tree", Tree)
+        # isoformat() is "YYYY-MM-DDTHH:MM:SS[.ffffff]"; slice instead of parsing
+        timestamp = item["timestamp"][11:19]
+        sql_preview = item["sql"][:50] + ("..." if len(item["sql"]) > 50 else "")
+        label = f"[{timestamp}] {sql_preview}"
+        before = 0 if first and tree.root.children else None
+        tree.root.add_leaf(label, data={"type": "history", "sql": item["sql"]}, before=before)
 
     def load_saved_queries_list(self):
         """Load saved queries into the saved queries tree"""
@@ -1113,59 +1821,74 @@ class DuckCLI(App):
         tree.root.expand()
         for child in list(tree.root.children):
             child.remove()
-        for i, item in enumerate(self.config["saved_queries"]):
-            timestamp = datetime.fromisoformat(item["timestamp"]).strftime("%d/%m %H:%M")
-            label = f"{item['name']} [{timestamp}]"
-            tree.root.add_leaf(label, data={"type": "saved", "sql": item["sql"]})
+        for item in self.config["saved_queries"]:
+            tree.root.add_leaf(self.saved_query_label(item), data={"type": "saved", "sql": item["sql"]})
+
+    def saved_query_label(self, item: dict) -> str:
+        ts = item["timestamp"]
+        return f"{item['name']} [{ts[8:10]}/{ts[5:7]} {ts[11:16]}]"
+
+    def update_saved_query_node(self, name: str):
+        """Add or refresh the tree leaf of one saved query, matching its list position"""
+        tree = self.query_one("#saved-queries-tree", Tree)
+        queries = self.config["saved_queries"]
+        i = saved_query_position(queries, name)
+        item = queries[i]
+        nodes = tree.root.children
+        if i < len(nodes):
+            nodes[i].set_label(self.saved_query_label(item))
+            nodes[i].data = {"type": "saved", "sql": item["sql"]}
+        else:
+            tree.root.add_leaf(self.saved_query_label(item), data={"type": "saved", "sql": item["sql"]})
 
     def refresh_tab_table(self, tab: QueryTab):
-        logging.debug(f"Refreshing table: {len(tab.full_data)} rows, {len(tab.column_names)} columns")
-        
-        tbl, data = tab.query_one(DataTable), [r[:] for r in tab.full_data]
-        
-        # Apply filters first
-        for i, s in tab.col_states.items():
-            if s["filter"]:
-                f = s["filter"].lower()
-                initial_count = len(data)
-                data = [r for r in data if f in str(r[i]).lower()]
-                logging.debug(f"Applied filter on column {i}: {initial_count} -> {len(data)} rows")
+        logging.debug(f"Refreshing table: {tab.result.num_rows} rows, {len(tab.column_names)} columns")
         
-        # Apply sorting
-        sort_applied = False
-        for i, s in tab.col_states.items():
-            if s["sort"]:
-                initial_count = len(data)
-                data.sort(key=lambda x: x[i] if x[i] is not None else "", reverse=(s["sort"]=="desc"))
-                sort_applied = True
-                logging.debug(f"Applied sort on column {i} ({tab.column_names[i] if i < len(tab.column_names) else 'N/A'}): {s['sort']}, {initial_count} rows sorted")
-                break
-
-        tbl.clear(columns=True)
-        # Add columns with sort indicators
-        for i, name in enumerate(tab.column_names):
-            s = tab.col_states[i]
-            sort_indicator = ''
-            if s['sort'] == 'asc':
-                sort_indicator = ' ▲'
-            elif s['sort'] == 'desc':
-                sort_indicator = ' ▼'
+        # Filtering and sorting run inside DuckDB; pages are then streamed from the cursor
+        tbl = tab.table
+        sql, params = tab.view_sql()
+        logging.debug(f"View query: {sql} {params}")
+        tab.view_cursor.execute(sql, params)
+        tab.rendered_rows, tab.view_done = 0, False
+        # One repaint for the clear, the headers and the first page together
+        with self.batch_update():
+            # Columns are only rebuilt after a new query; sort/filter changes just relabel them
+            tbl.clear(columns=tab.columns_changed)
+            for i, name in enumerate(tab.column_names):
+                s = tab.col_states[i]
+                lbl = name + HEADER_SUFFIXES[s['sort'], bool(s['filter'])]
+                if tab.columns_changed:
+                    tbl.add_column(lbl, key=str(i))
+                    logging.debug(f"Added column {i}: {lbl}")
+                else:
+                    column = tbl.columns[ColumnKey(str(i))]
+                    column.label = Text.from_markup(lbl)
+                    column.content_width = max(column.content_width, column.label.cell_len)
+            tab.columns_changed = False
             
-            filter_indicator = ' 🔍' if s['filter'] else ''
-            lbl = f"{name}{sort_indicator}{filter_indicator}"
-            tbl.add_column(lbl, key=str(i))
-            logging.debug(f"Added column {i}: {lbl}")
+            # Add only the first page of rows; the rest follow on scroll
+            self.append_tab_rows(tab)
         
-        # Add data rows
-        logging.debug(f"Adding {len(data)} data rows to table")
-        for r in data: 
-            tbl.add_row(*[str(v) if v is not None else "NULL" for v in r])
-        
-        logging.debug(f"Table refresh completed: {len(data)} rows, {len(tab.column_names)} columns")
+        logging.debug(f"Table refresh completed: {tab.rendered_rows} rows rendered, {len(tab.column_names)} columns")
+
+    def append_tab_rows(self, tab: QueryTab):
+        """Add the next PAGE_SIZE rows of the tab's current view to its DataTable."""
+        if tab.view_done:
+            return
+        page = tab.view_cursor.fetchmany(PAGE_SIZE)
+        tab.view_done = len(page) < PAGE_SIZE
+        tab.table.add_rows(page)
+        tab.rendered_rows += len(page)
+        logging.debug(f"Rendered {tab.rendered_rows} rows, done={tab.view_done}")
+
+    def on_results_table_near_end(self, event: ResultsTable.NearEnd):
+        for tab in event.table.ancestors:
+            if isinstance(tab, QueryTab):
+                self.append_tab_rows(tab)
+                break
 
     def on_data_table_header_selected(self, event: DataTable.HeaderSelected):
-        tabs = self.query_one("#tabs", TabbedContent)
-        tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
+        tab = self.active_query_tab()
         idx = int(event.column_key.value)
         
         logging.debug(f"Header selected: column index {idx}, column name {tab.column_names[idx] if idx < len(tab.column_names) else 'N/A'}")
@@ -1217,12 +1940,26 @@ class DuckCLI(App):
             relative_x = event.screen_x - widget.region.x
             if relative_x >= widget.region.width - 3:
                 pane_id = ContentTab.sans_prefix(widget.id)
-                self.query_one("#tabs", TabbedContent).remove_pane(pane_id)
+                self.close_tab(pane_id)
                 event.stop()
 
     def action_close_tab(self):
-        tabs = self.query_one("#tabs", TabbedContent)
-        if tabs.active: tabs.remove_pane(tabs.active)
+        if self.tabs.active: self.close_tab(self.tabs.active)
+
+    def close_tab(self, tab_id: str):
+        """Hide a tab for later reuse, or remove it when the pool is full or it is busy."""
+        tabs = self.tabs
+        tab = tabs.get_pane(tab_id).query_one(QueryTab)
+        busy = tab.running_task and not tab.running_task.is_finished
+        if busy:
+            # Stop the query before its cursor is closed on unmount
+            self.cancel_query(tab)
+        if len(self._tab_pool) >= TAB_POOL_SIZE or busy:
+            tabs.remove_pane(tab_id)
+            return
+        tab.reset("")
+        tabs.hide_tab(tab_id)
+        self._tab_pool.append(tab_id)
 
     def action_quit(self): self.exit()
 
@@ -1249,16 +1986,16 @@ class DuckCLI(App):
                 if c["id"] == conn_id:
                     def handle_retry(result):
                         if result:
-                            save_connection(result)
-                            self.config = load_config()
+                            save_connection(result, self.config)
+                            self.queue_config_save()
                             self.run_worker(self.connect_database(result))
                     self.push_screen(AddConnectionDialog(existing_conn=c), handle_retry)
                     break
         elif node_type == "add_connection":
             def handle_new_conn(result):
                 if result:
-                    save_connection(result)
-                    self.config = load_config()
+                    save_connection(result, self.config)
+                    self.queue_config_save()
                     self.run_worker(self.connect_database(result))
             self.push_screen(AddConnectionDialog(), handle_new_conn)
         elif node_type in ("history", "saved"):
@@ -1266,60 +2003,63 @@ class DuckCLI(App):
             if sql:
                 self.load_query_in_current_tab(sql)
 
-    def on_button_pressed(self, event: Button.Pressed):
-        """Handle button presses"""
-        if event.button.id in ["export-csv", "export-excel"]:
-            # Find the current tab and its data
-            tabs = self.query_one("#tabs", TabbedContent)
-            if not tabs.active: 
-                return
-            
-            tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-            if not tab.full_data or not tab.column_names:
-                # No data to export
-                meta = tab.query_one("#metadata-bar") if tab else None
-                if meta:
-                    meta.update("No data to export")
-                return
-            
-            # Determine export type based on button
-            export_type = "csv" if event.button.id == "export-csv" else "excel"
-            
-            def handle_export(result):
-                if result and result.get("exported"):
-                    filename = result["filename"]
-                    meta = tab.query_one("#metadata-bar")
-                    meta.update(f"Exported to {filename}")
-            
-            # Show export dialog
-            self.push_screen(ExportDialog(tab, export_type), handle_export)
+    def export_active_result(self, export_type: str):
+        """Open the export dialog for the active tab's result."""
+        # Find the current tab and its data
+        tab = self.active_query_tab()
+        if tab is None: 
+            return
         
-        elif event.button.id == "cancel-query":
-            # Cancel the running query
-            tabs = self.query_one("#tabs", TabbedContent)
-            if not tabs.active: 
-                return
-            
-            tab = self.query_one(f"#{tabs.active}").query_one(QueryTab)
-            if tab.running_task and not tab.running_task.done():
-                logging.debug("Cancelling query task and interrupting DuckDB")
-                # Interrupt DuckDB execution
+        if tab.result is None or not tab.result.num_rows:
+            # No data to export
+            meta = tab.meta_bar
+            if meta:
+                meta.update("No data to export")
+            return
+        
+        def handle_export(result):
+            if result and result.get("exported"):
+                filename = result["filename"]
+                tab.meta_bar.update(f"Exported to {filename}")
+        
+        # Show export dialog
+        self.push_screen(ExportDialog(tab, export_type), handle_export)
+
+    def cancel_active_query(self):
+        """Cancel the query running in the active tab."""
+        tab = self.active_query_tab()
+        if tab is None: 
+            return
+        self.cancel_query(tab)
+
+    def cancel_query(self, tab: QueryTab):
+        """Interrupt tab's cursor and cancel the worker running its query."""
+        if tab.running_task and not tab.running_task.is_finished:
+            logging.debug("Cancelling query worker and interrupting DuckDB")
+            # Interrupt the tab's own cursor; interrupting self.con wouldn't reach it
+            if tab.cursor is not None:
                 try:
-                    self.con.interrupt()
+                    tab.cursor.interrupt()
                 except Exception as e:
                     logging.error(f"Error interrupting DuckDB: {e}")
-                
-                tab.running_task.cancel()
-                meta = tab.query_one("#metadata-bar")
-                meta.update("Query cancelled")
-                tbl = tab.query_one(DataTable)
-                tbl.loading = False
-        
-        elif event.button.id == "close-tab":
-            # Close the current tab
-            tabs = self.query_one("#tabs", TabbedContent)
-            if tabs.active:
-                tabs.remove_pane(tabs.active)
+            
+            tab.running_task.cancel()
+            tab.meta_bar.update("Query cancelled")
+            tab.table.loading = False
+
+    # Button id -> handler; every click (dialog buttons bubble up here too) is one dict lookup
+    BUTTON_HANDLERS = {
+        "export-csv": lambda self: self.export_active_result("csv"),
+        "export-excel": lambda self: self.export_active_result("excel"),
+        "cancel-query": cancel_active_query,
+        "close-tab": action_close_tab,
+    }
+
+    def on_button_pressed(self, event: Button.Pressed):
+        """Handle button presses"""
+        handler = self.BUTTON_HANDLERS.get(event.button.id)
+        if handler:
+            handler(self)
     
     def on_input_changed(self, event: Input.Changed):
         """Handle search input changes for database tables"""
@@ -1327,7 +2067,7 @@ class DuckCLI(App):
             # Find the database tree and filter tables
             try:
                 db_tree = self.query_one("#db-tree", DatabaseTree)
-                db_tree.filter_tables(event.value)
+                db_tree.schedule_filter(event.value)
             except:
                 # If the element doesn't exist yet, ignore
                 pass